@@ -6,22 +6,42 @@ Receives webhook signals from TradingView and executes trades automatically
 # =============================================================================
 # IMPORTS
 # =============================================================================
+import asyncio
+import atexit
 import json
+import logging
+import logging.handlers
+import os
+import queue
+import socket
+import sqlite3
 import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal, getcontext, ROUND_DOWN
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+import orjson
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 import ccxt
+import ccxt.pro as ccxt_pro
 
 # =============================================================================
 # CONFIGURATION - STRATEGY PARAMETERS
 # =============================================================================
-INITIAL_STOP_LOSS_PCT = Decimal('0.01')        # 1%
-BREAKEVEN_TRIGGER_PCT = Decimal('2')           # 2%
-TRAILING_PROFIT_ACTIVATION_PCT = Decimal('4')  # 4%
-TRAILING_PROFIT_EXIT_PCT = Decimal('2')        # 2%
-TAKE_PROFIT_TARGET_PCT = Decimal('1.04')       # 4%
+# Prices are tracked as floats; Decimal is kept for order amounts only
+INITIAL_STOP_LOSS_PCT = 0.01          # 1%
+BREAKEVEN_TRIGGER_PCT = 2.0           # 2%
+TRAILING_PROFIT_ACTIVATION_PCT = 4.0  # 4%
+TRAILING_PROFIT_EXIT_PCT = 2.0        # 2%
+TAKE_PROFIT_TARGET_PCT = 1.04         # 4%
+
+# Price multipliers derived from the percentages, applied once per position
+BREAKEVEN_TRIGGER_FACTOR = 1 + BREAKEVEN_TRIGGER_PCT / 100
+TRAIL_ACTIVATION_FACTOR = 1 + TRAILING_PROFIT_ACTIVATION_PCT / 100
+TRAIL_EXIT_FACTOR = 1 - TRAILING_PROFIT_EXIT_PCT / 100
 
 # =============================================================================
 # TERMINAL COLORS
@@ -35,10 +55,38 @@ class Colors:
     BOLD = '\033[1m'
     ENDC = '\033[0m'
 
+# =============================================================================
+# LOGGING
+# =============================================================================
+# Callers only enqueue records; one listener thread does the terminal writes
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+log_listener.start()
+# Drain queued records on interpreter exit
+atexit.register(log_listener.stop)
+
+log = logging.getLogger('bot')
+log.setLevel(logging.INFO)
+log.addHandler(logging.handlers.QueueHandler(log_queue))
+log.propagate = False
+
 # =============================================================================
 # FLASK
 # =============================================================================
+# orjson for webhook parsing and responses; Decimals serialize as strings
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=str), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 getcontext().prec = 28
 
 # =============================================================================
@@ -46,19 +94,134 @@ getcontext().prec = 28
 # =============================================================================
 from config import api_key, api_secret
 
-exchange = ccxt.mexc({
+exchange_config = {
     'apiKey': api_key,
     'secret': api_secret,
     'enableRateLimit': True,
     'options': {'defaultType': 'spot'}
-})
-
+}
+
+# Pooled keep-alive connections for the sync client: urllib3's defaults
+# already disable Nagle (TCP_NODELAY); SO_KEEPALIVE stops idle pooled
+# sockets from being silently dropped between webhooks
+class KeepAliveAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+exchange = ccxt.mexc(exchange_config)
+exchange.session.mount('https://', KeepAliveAdapter(pool_connections=16, pool_maxsize=32))
 exchange.load_markets()
 
+# WebSocket client used by the monitors; shares the markets loaded above
+async_exchange = ccxt_pro.mexc(exchange_config)
+async_exchange.set_markets(exchange.markets, exchange.currencies)
+
+# =============================================================================
+# EVENT LOOP
+# =============================================================================
+# All price feeds run as coroutines on this single background loop
+loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, daemon=True).start()
+
+# =============================================================================
+# PERSISTENCE
+# =============================================================================
+# Open positions are mirrored to SQLite so a restart resumes monitoring them
+# instead of orphaning them. Rows are written only on state changes.
+POSITIONS_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'positions.db')
+
+db = sqlite3.connect(POSITIONS_DB, check_same_thread=False, isolation_level=None)
+db.execute('PRAGMA journal_mode=WAL')
+db.execute('PRAGMA synchronous=NORMAL')
+db.execute('CREATE TABLE IF NOT EXISTS positions (symbol TEXT PRIMARY KEY, data BLOB NOT NULL)')
+db_lock = threading.Lock()
+
+# Holds the position lock so a save can never resurrect a position that an
+# exit has just closed and deleted. If another thread holds it (a sell in
+# flight), mark the position dirty instead of stalling the event loop; that
+# thread calls flush_position() once it releases the lock.
+def save_position(pos):
+    pos['dirty'] = True
+    if not pos['lock'].acquire(blocking=False):
+        return
+
+    try:
+        if pos['status'] != 'open':
+            return
+
+        pos['dirty'] = False
+        data = orjson.dumps(
+            {k: v for k, v in pos.items() if k not in ('lock', 'dirty')}, default=str
+        )
+        with db_lock:
+            db.execute(
+                'INSERT OR REPLACE INTO positions (symbol, data) VALUES (?, ?)',
+                (pos['symbol'], data)
+            )
+    finally:
+        pos['lock'].release()
+
+def flush_position(pos):
+    if pos.get('dirty'):
+        save_position(pos)
+
+def delete_position(symbol):
+    with db_lock:
+        db.execute('DELETE FROM positions WHERE symbol = ?', (symbol,))
+
+def load_positions():
+    with db_lock:
+        rows = db.execute('SELECT data FROM positions').fetchall()
+
+    positions = []
+    for (data,) in rows:
+        pos = orjson.loads(data)
+        pos['amount'] = Decimal(pos['amount'])
+        pos['lock'] = threading.Lock()
+        positions.append(pos)
+    return positions
+
 # =============================================================================
 # GLOBAL POSITIONS
 # =============================================================================
+# Shared by the Flask threads and the event loop thread; mutate under the lock
 open_positions = {}
+positions_lock = threading.Lock()
+
+# Only drops the entry if it is still this position (a new buy may have replaced it)
+def remove_position(symbol, position):
+    with positions_lock:
+        if open_positions.get(symbol) is position:
+            del open_positions[symbol]
+            delete_position(symbol)
+        position['status'] = 'closed'
+
+# =============================================================================
+# ORDER QUEUE
+# =============================================================================
+# Webhook jobs run here, one at a time in arrival order
+order_executor = ThreadPoolExecutor(max_workers=1)
+
+# Monitor-triggered exits get their own small pool so a stop loss never waits
+# behind queued buys; the per-position lock still prevents double sells
+exit_executor = ThreadPoolExecutor(max_workers=4)
+
+def run_order(action, symbol):
+    try:
+        symbol = resolve_symbol(symbol)
+    except ccxt.BadSymbol:
+        result = {'error': 'Unknown symbol'}
+    except Exception as e:
+        result = {'error': str(e)}
+    else:
+        result = action(symbol)
+    if 'error' in result:
+        log.error(f"{Colors.FAIL}{action.__name__.upper()} {symbol}: {result}{Colors.ENDC}")
+    else:
+        log.info(f"{Colors.OKGREEN}{action.__name__.upper()} {symbol}: {result}{Colors.ENDC}")
 
 # =============================================================================
 # WEBHOOK
@@ -71,29 +234,105 @@ def webhook():
         symbol = data.get('ticker').upper()
 
         if action == 'buy':
-            return buy(symbol)
+            order_executor.submit(run_order, buy, symbol)
         elif action == 'sell':
-            return sell(symbol)
+            order_executor.submit(run_order, sell, symbol)
         else:
             return jsonify({'error': 'Invalid action'}), 400
 
+        # Answer before touching the exchange so TradingView never times out and retries
+        return jsonify({'queued': True, 'action': action, 'symbol': symbol}), 202
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # =============================================================================
 # HELPERS
 # =============================================================================
+# One fetch_balance() returns every currency; serve lookups from it for `ttl`
+# seconds. Invalidated after each order, since orders change the balances.
+class BalanceCache:
+    def __init__(self, ttl=1.0):
+        self.ttl = ttl
+        self._free = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, currency):
+        with self._lock:
+            if time.monotonic() - self._fetched_at > self.ttl:
+                self._free = exchange.fetch_balance()['free']
+                self._fetched_at = time.monotonic()
+            return Decimal(str(self._free.get(currency) or 0))
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
+
+balance_cache = BalanceCache()
+
 def get_available_balance(currency):
-    balance = exchange.fetch_balance()
-    return Decimal(str(balance['free'].get(currency, 0)))
+    return balance_cache.get(currency)
+
+# Market limits/precisions are static intraday; reload them at most hourly,
+# and on an unknown symbol at most every few minutes
+MARKET_REFRESH_SECONDS = 3600
+MARKET_MISS_RELOAD_SECONDS = 300
+market_info_cache = {}
+markets_loaded_at = time.monotonic()
+
+def refresh_markets():
+    global markets_loaded_at
+    exchange.load_markets(reload=True)
+    async_exchange.set_markets(exchange.markets, exchange.currencies)
+    market_info_cache.clear()
+    markets_loaded_at = time.monotonic()
+
+# Map the webhook ticker to a unified symbol; exchange.market() also accepts
+# exchange ids, so TradingView's BTCUSDT resolves to BTC/USDT
+def resolve_symbol(symbol):
+    try:
+        return exchange.market(symbol)['symbol']
+    except ccxt.BadSymbol:
+        # Possibly listed since the last load, but don't reload on every typo
+        if time.monotonic() - markets_loaded_at < MARKET_MISS_RELOAD_SECONDS:
+            raise
+    refresh_markets()
+    return exchange.market(symbol)['symbol']
 
 def get_market_info(symbol):
-    market = exchange.markets[symbol]
-    min_amount = Decimal(str(market['limits']['amount']['min']))
-    min_cost = Decimal(str(market['limits']['cost']['min']))
-    amount_precision = market['precision']['amount']
-    price_precision = market['precision']['price']
-    return min_amount, min_cost, amount_precision, price_precision
+    if time.monotonic() - markets_loaded_at > MARKET_REFRESH_SECONDS:
+        refresh_markets()
+
+    info = market_info_cache.get(symbol)
+    if info is None:
+        market = exchange.market(symbol)
+
+        min_amount = Decimal(str(market['limits']['amount']['min']))
+        min_cost = Decimal(str(market['limits']['cost']['min']))
+        amount_precision = market['precision']['amount']
+        price_precision = market['precision']['price']
+        info = (min_amount, min_cost, amount_precision, price_precision)
+        market_info_cache[symbol] = info
+
+    return info
+
+# MEXC acknowledges market orders with little more than the id; confirm the
+# fill with a short exponential backoff (50 ms doubling, capped at 500 ms)
+FILL_POLL_RETRIES = 5
+FILL_TERMINAL_STATUSES = ('closed', 'canceled', 'rejected', 'expired')
+
+# A failed fetch is retried rather than raised: the order is already live
+def wait_for_fill(symbol, order):
+    retries = 0
+    while order.get('status') not in FILL_TERMINAL_STATUSES and retries < FILL_POLL_RETRIES:
+        time.sleep(min(0.05 * 2 ** retries, 0.5))
+        retries += 1
+        try:
+            order = exchange.fetch_order(order['id'], symbol)
+        except Exception as e:
+            log.warning(f"Fill check for {symbol} order {order['id']} failed: {e}")
+    return order
 
 # =============================================================================
 # BUY
@@ -102,35 +341,83 @@ def buy(symbol):
     try:
         usdt_balance = get_available_balance('USDT')
         if usdt_balance <= 0:
-            return jsonify({'error': 'No USDT balance'}), 400
+            return {'error': 'No USDT balance'}
 
         min_amount, min_cost, _, _ = get_market_info(symbol)
         if usdt_balance < min_cost:
-            return jsonify({'error': 'Below minimum order cost'}), 400
+            return {'error': 'Below minimum order cost'}
 
         order = exchange.create_market_buy_order(symbol, float(usdt_balance))
-        avg_price = Decimal(str(order['average'] or order['price']))
-        filled_amount = Decimal(str(order['filled']))
-
-        initial_sl = avg_price * (Decimal('1') - INITIAL_STOP_LOSS_PCT)
+        balance_cache.invalidate()
+        order = wait_for_fill(symbol, order)
+        if not order.get('filled'):
+            if order.get('status') in FILL_TERMINAL_STATUSES:
+                return {'error': f"Order not filled ({order['status']})"}
 
-        open_positions[symbol] = {
-            'symbol': symbol,
-            'entry_price': avg_price,
-            'amount': filled_amount,
-            'current_sl': initial_sl,
-            'peak_price': avg_price,
-            'trail_started': False,
-            'breakeven': False,
-            'status': 'open'
-        }
+            # Placed but never confirmed: keep checking in the background so a
+            # late fill still gets a monitored, persisted position
+            log.error(f"{Colors.FAIL}UNCONFIRMED BUY {symbol} order {order['id']}, still checking{Colors.ENDC}")
+            schedule_fill_check(symbol, order, 0)
+            return {'error': 'Fill unconfirmed', 'order_id': order['id']}
 
-        threading.Thread(target=monitor_position, args=(symbol,), daemon=True).start()
-
-        return jsonify({'status': 'BUY OK', 'price': str(avg_price)})
+        entry_price = open_position(symbol, order)
+        return {'status': 'BUY OK', 'price': entry_price}
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}
+
+def open_position(symbol, order):
+    entry_price = float(order['average'] or order['price'])
+    filled_amount = Decimal(str(order['filled']))
+
+    initial_sl = entry_price * (1 - INITIAL_STOP_LOSS_PCT)
+
+    position = {
+        'symbol': symbol,
+        'entry_price': entry_price,
+        'amount': filled_amount,
+        'current_sl': initial_sl,
+        'peak_price': entry_price,
+        'breakeven_trigger_price': entry_price * BREAKEVEN_TRIGGER_FACTOR,
+        'trail_activation_price': entry_price * TRAIL_ACTIVATION_FACTOR,
+        'trail_exit_price': entry_price * TRAIL_EXIT_FACTOR,
+        'trail_started': False,
+        'breakeven': False,
+        'status': 'open',
+        'lock': threading.Lock()
+    }
+    update_band(position)
+    with positions_lock:
+        open_positions[symbol] = position
+
+    save_position(position)
+    asyncio.run_coroutine_threadsafe(price_feed(symbol), loop)
+    return entry_price
+
+# Background re-checks of an unconfirmed buy: back off from 1 s up to 60 s
+# (about five minutes in total) before handing it over to the operator
+FILL_CONFIRM_ATTEMPTS = 10
+
+def schedule_fill_check(symbol, order, attempt):
+    timer = threading.Timer(min(2 ** attempt, 60), order_executor.submit,
+                            (confirm_fill, symbol, order, attempt))
+    timer.daemon = True
+    timer.start()
+
+def confirm_fill(symbol, order, attempt):
+    try:
+        order = wait_for_fill(symbol, order)
+        if order.get('filled'):
+            entry_price = open_position(symbol, order)
+            log.info(f"{Colors.OKGREEN}BUY {symbol}: late fill confirmed at {entry_price}{Colors.ENDC}")
+        elif order.get('status') in FILL_TERMINAL_STATUSES:
+            log.warning(f"{Colors.WARNING}BUY {symbol}: order {order['id']} not filled ({order['status']}){Colors.ENDC}")
+        elif attempt + 1 < FILL_CONFIRM_ATTEMPTS:
+            schedule_fill_check(symbol, order, attempt + 1)
+        else:
+            log.error(f"{Colors.FAIL}UNCONFIRMED BUY {symbol} order {order['id']}, check the exchange{Colors.ENDC}")
+    except Exception as e:
+        log.error(f"Fill confirmation error for {symbol}: {e}")
 
 # =============================================================================
 # SELL
@@ -139,73 +426,212 @@ def sell(symbol):
     try:
         position = open_positions.get(symbol)
         if not position:
-            return jsonify({'error': 'No open position'}), 400
+            return {'error': 'No open position'}
 
-        execute_sell(symbol, position['amount'])
-        del open_positions[symbol]
+        if not close_position(symbol, position):
+            return {'error': 'No open position'}
 
-        return jsonify({'status': 'SELL OK'})
+        return {'status': 'SELL OK'}
 
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return {'error': str(e)}
 
 def execute_sell(symbol, amount):
     exchange.create_market_sell_order(symbol, float(amount))
-    print(f"{Colors.FAIL}SELL EXECUTED {symbol}{Colors.ENDC}")
+    balance_cache.invalidate()
+    log.info(f"{Colors.FAIL}SELL EXECUTED {symbol}{Colors.ENDC}")
+
+# Every exit path (webhook sell, SL, TTP) goes through here; the per-position
+# lock plus the status check make sure only the first one actually sells
+def close_position(symbol, pos):
+    try:
+        with pos['lock']:
+            if pos['status'] != 'open':
+                return False
+
+            execute_sell(symbol, pos['amount'])
+            remove_position(symbol, pos)
+        return True
+    finally:
+        # If the sell failed the position is still open; persist any state
+        # change the monitor made while we held the lock
+        flush_position(pos)
 
 # =============================================================================
-# MONITOR POSITION
+# PRICE FEED
 # =============================================================================
-def monitor_position(symbol):
-    print(f"{Colors.OKGREEN}Monitoring {symbol}{Colors.ENDC}")
+async def price_feed(symbol):
+    log.info(f"{Colors.OKGREEN}Monitoring {symbol}{Colors.ENDC}")
 
     while symbol in open_positions:
         try:
-            pos = open_positions[symbol]
-            ticker = exchange.fetch_ticker(symbol)
-            price = Decimal(str(ticker['last']))
-
-            if price > pos['peak_price']:
-                pos['peak_price'] = price
-
-            profit_pct = (price - pos['entry_price']) / pos['entry_price'] * 100
-
-            # STOP LOSS
-            if price <= pos['current_sl']:
-                execute_sell(symbol, pos['amount'])
-                del open_positions[symbol]
-                break
-
-            # BREAKEVEN
-            if not pos['breakeven'] and profit_pct >= BREAKEVEN_TRIGGER_PCT:
-                pos['current_sl'] = pos['entry_price']
-                pos['breakeven'] = True
-
-            # TRAILING START
-            if not pos['trail_started'] and profit_pct >= TRAILING_PROFIT_ACTIVATION_PCT:
-                pos['trail_started'] = True
-
-            # TRAILING EXIT
-            if pos['trail_started']:
-                retrace = (pos['peak_price'] - price) / pos['peak_price'] * 100
-                if retrace >= TRAILING_PROFIT_EXIT_PCT:
-                    execute_sell(symbol, pos['amount'])
-                    del open_positions[symbol]
-                    break
-
-            sys.stdout.write(
-                f"\r{Colors.OKBLUE}{symbol} "
-                f"Price:{price} "
-                f"SL:{pos['current_sl']} "
-                f"P/L:{profit_pct:.2f}%{Colors.ENDC}"
-            )
-            sys.stdout.flush()
+            ticker = await async_exchange.watch_ticker(symbol)
+        except Exception as e:
+            log.error(f"Monitor error: {e}")
+            # Hand the symbol to ticker_poller() until the stream recovers
+            stale_symbols.add(symbol)
+            await asyncio.sleep(1)
+            continue
+
+        stale_symbols.discard(symbol)
+
+        # MEXC spot pushes book tickers (bid/ask only, no last); the bid
+        # is also what a market sell fills against
+        price = ticker['last'] or ticker['bid']
+        if price is None:
+            continue
+
+        if await run_exit_check(symbol, float(price)):
+            break
+
+    stale_symbols.discard(symbol)
+    exit_backoff.pop(symbol, None)
+    last_status.pop(symbol, None)
+    try:
+        await async_exchange.un_watch_ticker(symbol)
+    except Exception:
+        pass
+
+# Symbols whose WebSocket stream is currently failing
+stale_symbols = set()
+
+# A failing exit (e.g. a rejected sell) is retried with exponential backoff,
+# 1 s doubling up to EXIT_RETRY_MAX_SECONDS, shared by the feed and the poller
+EXIT_RETRY_MAX_SECONDS = 60
+exit_backoff = {}  # symbol -> (monotonic time of next attempt, current delay)
 
-            time.sleep(0.5)
+async def run_exit_check(symbol, price):
+    backoff = exit_backoff.get(symbol)
+    if backoff and time.monotonic() < backoff[0]:
+        return False
 
+    try:
+        closed = await check_exits(symbol, price)
+    except Exception as e:
+        delay = min(backoff[1] * 2, EXIT_RETRY_MAX_SECONDS) if backoff else 1.0
+        exit_backoff[symbol] = (time.monotonic() + delay, delay)
+        log.error(f"Exit error for {symbol}, retrying in {delay:.0f}s: {e}")
+        return False
+
+    if closed:
+        exit_backoff.pop(symbol, None)
+    return closed
+
+# REST fallback for stale streams: one batched fetch_tickers call per tick
+# covers every affected position instead of one request per symbol
+async def ticker_poller():
+    while True:
+        await asyncio.sleep(0.5)
+        symbols = [s for s in stale_symbols if s in open_positions]
+        if not symbols:
+            continue
+
+        try:
+            tickers = await async_exchange.fetch_tickers(symbols)
         except Exception as e:
-            print(f"\nMonitor error: {e}")
-            time.sleep(1)
+            log.error(f"Poller error: {e}")
+            continue
+
+        # run_exit_check() never raises, so one failed exit cannot end the poller
+        for symbol, ticker in tickers.items():
+            if symbol in stale_symbols and ticker.get('last') is not None:
+                await run_exit_check(symbol, float(ticker['last']))
+
+asyncio.run_coroutine_threadsafe(ticker_poller(), loop)
+
+# =============================================================================
+# MONITOR POSITION
+# =============================================================================
+# Runs on every pushed tick; returns True once the position is closed
+async def check_exits(symbol, price):
+    pos = open_positions.get(symbol)
+    if not pos:
+        return True
+
+    # Fast path: between the exit price and the next trigger nothing can change
+    if pos['exit_price'] < price < pos['next_event_price']:
+        render_status(symbol, pos, price)
+        return False
+
+    # PEAK (only matters once trailing)
+    if pos['trail_started'] and price > pos['peak_price']:
+        pos['peak_price'] = price
+        pos['trail_exit_price'] = price * TRAIL_EXIT_FACTOR
+
+    # STOP LOSS
+    if price <= pos['current_sl']:
+        await loop.run_in_executor(exit_executor, close_position, symbol, pos)
+        return True
+
+    # BREAKEVEN
+    if not pos['breakeven'] and price >= pos['breakeven_trigger_price']:
+        pos['current_sl'] = pos['entry_price']
+        pos['breakeven'] = True
+
+    # TRAILING START
+    if not pos['trail_started'] and price >= pos['trail_activation_price']:
+        pos['trail_started'] = True
+        pos['peak_price'] = price
+        pos['trail_exit_price'] = price * TRAIL_EXIT_FACTOR
+
+    # TRAILING EXIT
+    if pos['trail_started'] and price <= pos['trail_exit_price']:
+        await loop.run_in_executor(exit_executor, close_position, symbol, pos)
+        return True
+
+    update_band(pos)
+    save_position(pos)
+    render_status(symbol, pos, price)
+    return False
+
+# Collapses the SL / BE / TTP rules into one open interval per position:
+# a tick strictly inside (exit_price, next_event_price) can neither exit
+# nor change state, so it costs a single chained comparison
+def update_band(pos):
+    exit_price = pos['current_sl']
+    if pos['trail_started']:
+        exit_price = max(exit_price, pos['trail_exit_price'])
+        next_event_price = pos['peak_price']
+    else:
+        next_event_price = pos['trail_activation_price']
+        if not pos['breakeven']:
+            next_event_price = min(next_event_price, pos['breakeven_trigger_price'])
+
+    pos['exit_price'] = exit_price
+    pos['next_event_price'] = next_event_price
+
+# =============================================================================
+# STATUS LINE
+# =============================================================================
+# Exits are checked on every tick but the status line is logged at most every
+# STATUS_INTERVAL_SECONDS, and only when something on it changed
+STATUS_INTERVAL_SECONDS = 2.0
+STATUS_TEMPLATE = (
+    Colors.OKBLUE + "{symbol} Price:{price} SL:{sl:.8g} P/L:{pnl:.2f}%" + Colors.ENDC
+)
+last_status = {}  # symbol -> (rendered state, monotonic time)
+
+def render_status(symbol, pos, price):
+    state = (price, pos['current_sl'], pos['peak_price'], pos['trail_started'])
+    now = time.monotonic()
+    previous = last_status.get(symbol)
+    if previous and (previous[0] == state or now - previous[1] < STATUS_INTERVAL_SECONDS):
+        return
+
+    last_status[symbol] = (state, now)
+    entry = pos['entry_price']
+    profit_pct = (price - entry) * 100.0 / entry
+    log.info(STATUS_TEMPLATE.format_map(
+        {'symbol': symbol, 'price': price, 'sl': pos['current_sl'], 'pnl': profit_pct}
+    ))
+
+# =============================================================================
+# RESTORE
+# =============================================================================
+for position in load_positions():
+    open_positions[position['symbol']] = position
+    asyncio.run_coroutine_threadsafe(price_feed(position['symbol']), loop)
+    log.info(f"{Colors.OKCYAN}Restored {position['symbol']} from {POSITIONS_DB}{Colors.ENDC}")
 
 # =============================================================================
 # RUN
@@ -0,0 +1,9 @@
+# Production server for the webhook: gunicorn -c gunicorn.conf.py aingbot:app
+#
+# Keep a single worker: open positions, price feeds and the order queue live
+# in that process's memory. Concurrent alerts are served by its threads.
+bind = '0.0.0.0:5000'
+workers = 1
+worker_class = 'gthread'
+threads = 8
+keepalive = 5